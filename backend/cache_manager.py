@@ -1,21 +1,66 @@
-import os
-import joblib
-from typing import Any, Optional
+import json
+import functools
+import threading
+import diskcache
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Optional
+from urllib.parse import urlencode
 
 CACHE_DIR = "cache_data"
-if not os.path.exists(CACHE_DIR):
-    os.makedirs(CACHE_DIR)
+CACHE_SIZE_LIMIT = 500 * 1024 ** 2  # Oldest entries are culled past 500 MB
+Path(CACHE_DIR).mkdir(parents=True, exist_ok=True)
 
-memory = joblib.Memory(CACHE_DIR, verbose=0)
+cache = diskcache.Cache(CACHE_DIR, size_limit=CACHE_SIZE_LIMIT)
 
-@memory.cache
-def cached_request(func, *args, **kwargs):
+def request_key(url: str, params: Optional[Dict[str, Any]] = None, method: str = "GET", json_body: Any = None) -> str:
     """
-    Wrapper to cache function calls. 
-    However, joblib decorates functions directly.
-    We will expose a decorator or just use this file to configure the memory object.
+    Build a cache key straight from the request.
+    Unlike joblib, this avoids pickling and hashing the arguments on every lookup.
     """
-    return func(*args, **kwargs)
+    query = urlencode(sorted(params.items())) if params else ""
+    body = json.dumps(json_body, sort_keys=True) if json_body is not None else ""
+    return f"{method.upper()} {url}?{query}|{body}"
 
-def get_memory():
-    return memory
+def cache_request(func: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Decorator for fetch functions with a (url, params, ..., method, json_body) signature.
+    Responses are stored on disk by request key; failed requests (None) are not cached.
+    """
+    @functools.wraps(func)
+    def wrapper(url: str, params: Optional[Dict[str, Any]] = None, **kwargs) -> Any:
+        key = request_key(url, params, kwargs.get("method", "GET"), kwargs.get("json_body"))
+        data = cache.get(key)
+        if data is None:
+            data = func(url, params, **kwargs)
+            if data is not None:
+                cache.set(key, data)
+        return data
+    return wrapper
+
+class LRUCache:
+    """
+    Small thread-safe in-process LRU cache.
+    Used in front of the disk cache for hot entries, where a dict lookup beats a disk read.
+    """
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+def get_cache():
+    return cache
@@ -1,5 +1,28 @@
 import networkx as nx
-from typing import Dict, Any, List, Set, Tuple
+import numpy as np
+import scipy.sparse as sp
+from scipy.optimize import minimize
+from functools import lru_cache
+from typing import Dict, Any, FrozenSet, List, Optional, Tuple
+
+# LOWER THRESHOLD: 0.1 is actually quite high for papers. 
+# Try 0.05 or just checking for > 1 shared reference
+SIMILARITY_THRESHOLD = 0.05
+
+# Optimal node spacing for the force layout, as a fraction of the layout radius
+LAYOUT_SPACING = 0.2
+
+# Number of set bits in every possible byte value
+_POPCOUNT_8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+def _popcount_rows(words: np.ndarray) -> np.ndarray:
+    """
+    Set bits per row of a uint64 array. Uses the native popcount ufunc
+    (NumPy >= 2.0) and falls back to the byte lookup table otherwise.
+    """
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words).sum(axis=1, dtype=np.int64)
+    return _POPCOUNT_8[words.view(np.uint8)].sum(axis=1, dtype=np.int64)
 
 def build_network_graph(seed_paper_details: Dict[str, Any], neighborhood_papers: List[Dict[str, Any]], width: int = 1000, height: int = 1000) -> Dict[str, Any]:
     G = nx.Graph()
@@ -12,78 +35,74 @@ def build_network_graph(seed_paper_details: Dict[str, Any], neighborhood_papers:
         if not paper.get("paperId"): continue
         add_node(G, paper)
 
+    nodes = list(G.nodes(data=True))
+    node_ids = [pid for pid, _ in nodes]
+    index = {pid: i for i, pid in enumerate(node_ids)}
+    seed_idx = index[seed_id]
+    
+    # Map paperId -> Set of Reference IDs
+    # DATA CHECK: If 'references' is None/Empty, Jaccard will always be 0.
+    paper_references: Dict[str, FrozenSet[str]] = {pid: data["ref_ids"] for pid, data in nodes}
+
     # =========================================================
     # FIX PART 1: ADD BASE LAYER (Direct Connections)
     # =========================================================
     # We must connect the Seed to the papers we found. 
     # Otherwise, they float in void if they don't share enough references.
     
-    # Collect all neighborhood IDs for quick lookup
-    neighborhood_ids = set(p["paperId"] for p in neighborhood_papers if p.get("paperId"))
-
-    # Connect Seed -> Neighbors (if Seed cites them)
-    for ref in seed_paper_details.get("references", []):
-        ref_id = ref.get("paperId")
-        if ref_id in neighborhood_ids:
-            G.add_edge(seed_id, ref_id, weight=1.0, type="citation")
+    # Sparse citation adjacency: C[i, j] = 1 when paper i cites paper j.
+    # Covers Seed -> Neighbors, and Neighbors -> Seed / other Neighbors via their references.
+    rows: List[int] = []
+    cols: List[int] = []
+    for i, pid in enumerate(node_ids):
+        for ref_id in paper_references[pid]:
+            j = index.get(ref_id)
+            if j is not None and j != i:
+                rows.append(i)
+                cols.append(j)
 
     # Connect Neighbors -> Seed (if they cite Seed)
     # Note: This depends on if your API response included 'citations' for the seed
     for cit in seed_paper_details.get("citations", []):
-        cit_id = cit.get("paperId")
-        if cit_id in neighborhood_ids:
-            G.add_edge(seed_id, cit_id, weight=1.0, type="citation")
+        i = index.get(cit.get("paperId"))
+        if i is not None and i != seed_idx:
+            rows.append(i)
+            cols.append(seed_idx)
+
+    C = sp.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(len(node_ids), len(node_ids)))
+    # Symmetrize for the undirected graph; A + A^T counts mutual links twice, so clip to 1
+    citation_weight = ((C + C.T) > 0).toarray().astype(float)
 
     # If the API didn't give us explicit citation links but we KNOW they are neighbors:
     # Force connection for the visualization (Optional but recommended for UI)
-    if G.number_of_edges() == 0:
-         for p_id in neighborhood_ids:
-             G.add_edge(seed_id, p_id, weight=0.5, type="implied")
+    implied = not citation_weight[seed_idx].any()
+    if implied:
+        citation_weight[seed_idx, :] = 0.5
+        citation_weight[:, seed_idx] = 0.5
+        citation_weight[seed_idx, seed_idx] = 0.0
 
     # =========================================================
     # PART 2: SIMILARITY LAYER (Bibliographic Coupling)
     # =========================================================
-    nodes = list(G.nodes(data=True))
-    
-    # Map paperId -> Set of Reference IDs
-    paper_references: Dict[str, Set[str]] = {}
-    for pid, data in nodes:
-        # DATA CHECK: If 'references' is None/Empty, Jaccard will always be 0.
-        refs = data.get("references", [])
-        ref_ids = set()
-        if refs:
-            for r in refs:
-                if r.get("paperId"):
-                    ref_ids.add(r["paperId"])
-        paper_references[pid] = ref_ids
-
-    # Iterate pairs
-    for i in range(len(nodes)):
-        for j in range(i + 1, len(nodes)):
-            p1_id, p1_data = nodes[i]
-            p2_id, p2_data = nodes[j]
-
-            # Skip if it's the Seed (we already handled Seed connections above)
-            # Or keep it if you want to see if Seed is *similar* to neighbors beyond direct citation
-            
-            refs1 = paper_references.get(p1_id, set())
-            refs2 = paper_references.get(p2_id, set())
-            
-            # DEBUG: Print if sets are empty (helps verify if API fetched references)
-            # if not refs1 or not refs2: print(f"Warning: No refs for {p1_id} or {p2_id}")
+    # Jaccard for every pair at once over bit-packed reference sets
+    sim_matrix = calculate_jaccard_matrix([paper_references[pid] for pid in node_ids], SIMILARITY_THRESHOLD)
 
-            sim_score = calculate_jaccard_similarity(refs1, refs2)
-            
-            # LOWER THRESHOLD: 0.1 is actually quite high for papers. 
-            # Try 0.05 or just checking for > 1 shared reference
-            if sim_score > 0.05: 
-                # Check if edge exists (from citation layer)
-                if G.has_edge(p1_id, p2_id):
-                    # Reinforce existing edge
-                    G[p1_id][p2_id]['weight'] += sim_score
-                    G[p1_id][p2_id]['type'] = "strong_citation"
-                else:
-                    G.add_edge(p1_id, p2_id, weight=sim_score, type="similarity")
+    # Combine both layers over the upper triangle: similarity reinforces citation
+    # edges, and the weight/type of every edge is computed in one vectorized pass
+    linked = citation_weight > 0
+    similar = sim_matrix > SIMILARITY_THRESHOLD
+    rows, cols = np.nonzero(np.triu(linked | similar, k=1))
+    weights = (citation_weight + np.where(similar, sim_matrix, 0.0))[rows, cols]
+    is_linked = linked[rows, cols]
+    is_similar = similar[rows, cols]
+    types = np.select([is_linked & is_similar, is_similar], ["strong_citation", "similarity"], default="citation")
+    if implied:
+        types[~is_similar & ((rows == seed_idx) | (cols == seed_idx))] = "implied"
+
+    G.add_edges_from(
+        (node_ids[i], node_ids[j], {"weight": w, "type": t})
+        for i, j, w, t in zip(rows.tolist(), cols.tolist(), weights.tolist(), types.tolist())
+    )
 
     return graph_to_react_flow(G, width, height)
 
@@ -103,17 +122,101 @@ def add_node(G: nx.Graph, paper: Dict[str, Any], is_seed: bool = False):
         year=year, 
         citationCount=citation_count,
         isSeed=is_seed,
-        references=paper.get("references", []),
-        citations=paper.get("citations", []),
+        # Only the reference IDs are needed for edges; the Seed's citations are read from the paper itself
+        ref_ids=frozenset(r["paperId"] for r in (paper.get("references") or []) if r.get("paperId")),
         abstract=paper.get("abstract")
     )
 
-def calculate_jaccard_similarity(set1: Set[str], set2: Set[str]) -> float:
-    union = len(set1.union(set2))
-    if union == 0:
-        return 0.0
-    intersection = len(set1.intersection(set2))
-    return intersection / union
+def calculate_jaccard_matrix(ref_sets: List[FrozenSet[str]], min_similarity: float = 0.0) -> np.ndarray:
+    """
+    Pairwise Jaccard similarity between reference sets, as an N x N matrix.
+    Each set is packed into a uint64 bitvector over all reference IDs, so a
+    pair's intersection is a bitwise AND followed by a popcount.
+    Pairs that cannot exceed min_similarity are left at 0 without being compared.
+    """
+    n = len(ref_sets)
+    ref_index: Dict[str, int] = {}
+    for refs in ref_sets:
+        for ref_id in refs:
+            ref_index.setdefault(ref_id, len(ref_index))
+
+    words = max(1, -(-len(ref_index) // 64))
+    bits = np.zeros((n, words * 64), dtype=bool)
+    for row, refs in enumerate(ref_sets):
+        bits[row, np.fromiter((ref_index[r] for r in refs), dtype=np.intp, count=len(refs))] = True
+    packed = np.packbits(bits, axis=1).view(np.uint64)
+    sizes = bits.sum(axis=1)
+
+    # J(A, B) <= min(|A|, |B|) / max(|A|, |B|): skip pairs whose bound can't
+    # beat min_similarity, which includes every pair with an empty set
+    iu, ju = np.triu_indices(n, k=1)
+    keep = np.minimum(sizes[iu], sizes[ju]) > min_similarity * np.maximum(sizes[iu], sizes[ju])
+    iu, ju = iu[keep], ju[keep]
+
+    # |A & B| via popcount; |A | B| follows from the set sizes
+    intersection = _popcount_rows(packed[iu] & packed[ju])
+    union = sizes[iu] + sizes[ju] - intersection
+
+    sim = np.zeros((n, n))
+    sim[iu, ju] = np.divide(intersection, union, out=np.zeros(len(iu)), where=union > 0)
+    sim[ju, iu] = sim[iu, ju]
+    return sim
+
+@lru_cache(maxsize=128)
+def _compute_layout(node_list: Tuple[str, ...], edge_set: FrozenSet[Tuple[str, str, float]]) -> Dict[str, Tuple[float, float]]:
+    """
+    Force-directed layout scaled to the [-1, 1] box, cached per graph topology.
+    """
+    H = nx.Graph()
+    H.add_nodes_from(node_list)
+    H.add_weighted_edges_from(edge_set)
+    pos = _fr_lbfgs_layout(H, k=LAYOUT_SPACING, seed=42)
+    return {n: (float(x), float(y)) for n, (x, y) in zip(node_list, pos)}
+
+def _fr_lbfgs_layout(G: nx.Graph, k: float, seed: int = 42, maxiter: int = 50, gravity: float = 1.0) -> np.ndarray:
+    """
+    Fruchterman-Reingold layout found by minimizing its energy with L-BFGS
+    (as in NetworkX's energy-based spring layout) instead of iterating forces.
+    Energy per pair: w * d^3 / (3k) for edges, -k^2 * log(d) for all pairs,
+    plus a gravity term that keeps disconnected parts from drifting apart.
+    Returns positions in node order, rescaled to the [-1, 1] box.
+    """
+    n = G.number_of_nodes()
+    if n <= 1:
+        return np.zeros((n, 2))
+
+    A = nx.to_numpy_array(G, weight="weight")
+    x0 = np.random.default_rng(seed).random((n, 2))
+
+    def energy(x: np.ndarray) -> Tuple[float, np.ndarray]:
+        pos = x.reshape(n, 2)
+        delta = pos[:, None, :] - pos[None, :, :]
+        dist = np.sqrt((delta ** 2).sum(axis=-1))
+        np.fill_diagonal(dist, 1.0)
+        dist = np.maximum(dist, 1e-9)
+        centered = pos - pos.mean(axis=0)
+
+        cost = 0.5 * (A * dist ** 3 / (3 * k) - k ** 2 * np.log(dist)).sum()
+        cost += 0.5 * gravity * (centered ** 2).sum()
+
+        coef = A * dist / k - k ** 2 / dist ** 2
+        np.fill_diagonal(coef, 0.0)
+        grad = (coef[:, :, None] * delta).sum(axis=1) + gravity * centered
+        return cost, grad.ravel()
+
+    result = minimize(energy, x0.ravel(), jac=True, method="L-BFGS-B", options={"maxiter": maxiter})
+    return nx.rescale_layout(result.x.reshape(n, 2), scale=1.0)
+
+def _safe_int_year(year: Any) -> Optional[int]:
+    """
+    Year as an int, or None when missing or not a number (e.g. "2020-05").
+    """
+    if not year:
+        return None
+    try:
+        return int(year)
+    except (TypeError, ValueError):
+        return None
 
 def graph_to_react_flow(G: nx.Graph, width: int = 1000, height: int = 1000) -> Dict[str, Any]:
     """
@@ -130,8 +233,11 @@ def graph_to_react_flow(G: nx.Graph, width: int = 1000, height: int = 1000) -> D
     min_dim = min(width, height)
     dynamic_scale = min_dim * 0.6
     try:
-        k_val = dynamic_scale / 5.0 
-        pos = nx.spring_layout(G, k=k_val, scale=dynamic_scale, iterations=100, seed=42)
+        # Layout depends only on topology, so a resize just rescales the cached unit layout
+        node_list = tuple(G.nodes())
+        edge_set = frozenset((min(u, v), max(u, v), data.get("weight", 1.0)) for u, v, data in G.edges(data=True))
+        unit_pos = _compute_layout(node_list, edge_set)
+        pos = {n: (x * dynamic_scale, y * dynamic_scale) for n, (x, y) in unit_pos.items()}
     except Exception:
         pos = nx.circular_layout(G, scale=dynamic_scale)
 
@@ -157,18 +263,18 @@ def graph_to_react_flow(G: nx.Graph, width: int = 1000, height: int = 1000) -> D
                 "isSeed": data.get("isSeed", False),
                 "abstract": data.get("abstract")
             },
-            "position": {"x": x, "y": y}, 
+            "position": {"x": float(x), "y": float(y)}, 
             "type": "default",
             "style": style
         })
 
     # 2. PROCESS EDGES (Updated with Direction Logic)
+    # Parse years once per node, outside the edge loop
+    year_of = {n: _safe_int_year(d.get("year")) for n, d in G.nodes(data=True)}
+
     for u, v, data in G.edges(data=True):
-        u_node = G.nodes[u]
-        v_node = G.nodes[v]
-        
-        u_year = u_node.get("year")
-        v_year = v_node.get("year")
+        uy = year_of[u]
+        vy = year_of[v]
         
         # Default direction (arbitrary)
         source = u
@@ -177,25 +283,18 @@ def graph_to_react_flow(G: nx.Graph, width: int = 1000, height: int = 1000) -> D
         
         # HEURISTIC: Point from Older -> Newer
         # If A(2008) and B(2013) are connected, arrow goes A -> B
-        if u_year and v_year:
-            try:
-                # Ensure years are integers
-                uy = int(u_year)
-                vy = int(v_year)
-                
-                if uy < vy:
-                    source = u
-                    target = v
-                    show_arrow = True
-                elif vy < uy:
-                    source = v
-                    target = u
-                    show_arrow = True
-                else:
-                    # Same year? No arrow, or rely on explicit 'citations' data if you have it
-                    show_arrow = False 
-            except ValueError:
-                pass # Handle cases where year is missing or a string like "2020-05"
+        if uy is not None and vy is not None:
+            if uy < vy:
+                source = u
+                target = v
+                show_arrow = True
+            elif vy < uy:
+                source = v
+                target = u
+                show_arrow = True
+            else:
+                # Same year? No arrow, or rely on explicit 'citations' data if you have it
+                show_arrow = False 
 
         # Style Logic
         edge_color = "#b1b1b7"
@@ -211,7 +310,7 @@ def graph_to_react_flow(G: nx.Graph, width: int = 1000, height: int = 1000) -> D
             "source": source,
             "target": target,
             "animated": False,
-            "label": f"{data['weight']:.2f}" if data.get('weight') else "",
+            "label": round(data['weight'], 2) if data.get('weight') else "",
             "style": {
                 "stroke": edge_color, 
                 "strokeWidth": 2,
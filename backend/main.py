@@ -1,21 +1,34 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 import os
-from openai import OpenAI
+import hashlib
+import anyio
+import orjson
+from anyio import CapacityLimiter
+from openai import AsyncOpenAI
 # from semantic_scholar import s2_client
 from open_alex import open_alex_client as data_client
 from graph_logic import build_network_graph
+from cache_manager import LRUCache
 
 from dotenv import load_dotenv
 
 load_dotenv()
 
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+client = AsyncOpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
 
 app = FastAPI(title="ResearchGraph API")
 
+# Blocking data-client and graph work runs in worker threads with its own capacity,
+# so it neither blocks the event loop nor exhausts Starlette's shared threadpool
+NET_LIMIT = CapacityLimiter(16)
+
+async def run_blocking(func, *args):
+    return await anyio.to_thread.run_sync(func, *args, limiter=NET_LIMIT)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -31,13 +44,13 @@ async def root():
 
 @app.get("/search")
 async def search_paper_endpoint(query: str):
-    results = data_client.search_paper(query)
+    results = await run_blocking(data_client.search_paper, query)
     return {"results": results}
 
 @app.get("/build_graph")
 async def build_graph_endpoint(paper_id: str, width: int = 1000, height: int = 1000):
     # 1. Fetch seed paper details (references/citations included)
-    seed_paper = data_client.get_paper_details(paper_id)
+    seed_paper = await run_blocking(data_client.get_paper_details, paper_id)
     if not seed_paper:
         raise HTTPException(status_code=404, detail="Paper not found")
         
@@ -45,28 +58,72 @@ async def build_graph_endpoint(paper_id: str, width: int = 1000, height: int = 1
     references = seed_paper.get("references", [])[:20] 
     citations = seed_paper.get("citations", [])[:20]   
     
-    neighborhood_ids = [p["paperId"] for p in references if p.get("paperId")] + \
-                       [p["paperId"] for p in citations if p.get("paperId")]
-    
-    # Remove duplicates
-    neighborhood_ids = list(set(neighborhood_ids))
+    # Remove duplicates and missing IDs in one pass; keeping the order
+    # makes batch requests (and their cache keys) deterministic
+    neighborhood_ids = list(dict.fromkeys(
+        pid for p in (*references, *citations) if (pid := p.get("paperId"))
+    ))
     
     # Batch fetch details
     try:
-        full_neighborhood = data_client.get_papers_batch(neighborhood_ids)
+        full_neighborhood = await run_blocking(data_client.get_papers_batch, neighborhood_ids)
         # Filter out None results
         full_neighborhood = [p for p in full_neighborhood if p]
                 
         # 3. Build Graph with dynamic layout dimensions
-        graph_data = build_network_graph(seed_paper, full_neighborhood, width, height)
+        graph_data = await run_blocking(build_network_graph, seed_paper, full_neighborhood, width, height)
         
-        return graph_data
+        # Serialize with orjson directly; skips jsonable_encoder and stdlib json
+        return Response(orjson.dumps(graph_data), media_type="application/json")
     except Exception as e:
         print(f"Error building graph: {e}")
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+# Finished LLM responses keyed on a SHA-1 of the endpoint and its inputs
+llm_cache = LRUCache(maxsize=256)
+
+# Sent as the last chunk when generation fails after some tokens were streamed
+STREAM_ERROR_MARKER = "\n[[STREAM_ERROR]]"
+
+def llm_cache_key(*parts: str) -> str:
+    return hashlib.sha1("\x00".join(parts).encode("utf-8")).hexdigest()
+
+def stream_completion(cache_key: str, prompt: str, max_tokens: int, error_message: str) -> StreamingResponse:
+    """
+    Stream the LLM response as plain text while it is generated.
+    Completed responses are kept in an LRU cache so repeat requests return instantly.
+    """
+    cached = llm_cache.get(cache_key)
+    if cached is not None:
+        return StreamingResponse(iter([cached]), media_type="text/plain")
+
+    async def generate():
+        parts = []
+        try:
+            stream = await client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=max_tokens,
+                stream=True
+            )
+            async for chunk in stream:
+                text = chunk.choices[0].delta.content if chunk.choices else None
+                if text:
+                    parts.append(text)
+                    yield text
+        except Exception as e:
+            print(f"LLM Error: {e}")
+            # Tokens already sent can't be taken back; mark the response as
+            # incomplete so the client discards it instead of caching it
+            yield STREAM_ERROR_MARKER if parts else error_message
+            return
+
+        llm_cache.set(cache_key, "".join(parts))
+
+    return StreamingResponse(generate(), media_type="text/plain")
+
 class SummarizeRequest(BaseModel):
     source_abstract: str
     target_abstract: str
@@ -74,7 +131,7 @@ class SummarizeRequest(BaseModel):
 @app.post("/summarize_connection")
 async def summarize_connection_endpoint(request: SummarizeRequest):
     if not client.api_key:
-        return {"summary": "OpenAI API Key not found. Please set OPENAI_API_KEY environment variable."}
+        return PlainTextResponse("OpenAI API Key not found. Please set OPENAI_API_KEY environment variable.")
         
     prompt = f"""
     Analyze the relationship between the following two research paper abstracts.
@@ -88,16 +145,8 @@ async def summarize_connection_endpoint(request: SummarizeRequest):
     Explain specifically why Paper B is related to Paper A. Does it refute, extend, or use the methodology? be concise.
     """
     
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=150
-        )
-        return {"summary": response.choices[0].message.content}
-    except Exception as e:
-        print(f"LLM Error: {e}")
-        return {"summary": "Failed to generate summary due to an error."}
+    cache_key = llm_cache_key("summarize_connection", request.source_abstract, request.target_abstract)
+    return stream_completion(cache_key, prompt, 150, "Failed to generate summary due to an error.")
 
 class ExplainAbstractRequest(BaseModel):
     abstract: str
@@ -105,7 +154,7 @@ class ExplainAbstractRequest(BaseModel):
 @app.post("/explain_abstract")
 async def explain_abstract_endpoint(request: ExplainAbstractRequest):
     if not client.api_key:
-        return {"explanation": "OpenAI API Key not found."}
+        return PlainTextResponse("OpenAI API Key not found.")
         
     prompt = f"""
     Explain the following research paper abstract in a clear, structured way for a general audience.
@@ -119,16 +168,8 @@ async def explain_abstract_endpoint(request: ExplainAbstractRequest):
     {request.abstract}
     """
     
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=600
-        )
-        return {"explanation": response.choices[0].message.content}
-    except Exception as e:
-        print(f"LLM Error: {e}")
-        return {"explanation": "Failed to generate explanation."}
+    cache_key = llm_cache_key("explain_abstract", request.abstract)
+    return stream_completion(cache_key, prompt, 600, "Failed to generate explanation.")
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,30 +1,52 @@
-import requests
+import httpx
+import orjson
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List, Optional
-from cache_manager import get_memory
-
-memory = get_memory()
+from cache_manager import LRUCache, cache_request
 
 OPENALEX_BASE = "https://api.openalex.org"
+BATCH_CHUNK_SIZE = 25
+BATCH_MAX_WORKERS = 8
+MEMORY_CACHE_SIZE = 1024
+
+# Shared HTTP/2 client: cache misses reuse one pooled connection instead of a new TCP+TLS handshake each
+_session = httpx.Client(
+    http2=True,
+    headers={
+        "User-Agent": "mailto:antigravity@example.com" # Placeholder, user should update or we use generic
+    },
+    timeout=15,
+    follow_redirects=True # Merged works redirect to their new ID
+)
 
-@memory.cache
+@cache_request
 def cached_fetch(url: str, params: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
     """
     Cached GET request for OpenAlex.
     """
-    headers = {
-        "User-Agent": "mailto:antigravity@example.com" # Placeholder, user should update or we use generic
-    }
     try:
-        response = requests.get(url, headers=headers, params=params)
+        response = _session.get(url, params=params)
         response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
+        return orjson.loads(response.content)
+    except (httpx.HTTPError, orjson.JSONDecodeError) as e:
         print(f"OpenAlex Request failed: {e}")
         return None
 
+# URL forms OpenAlex uses for work IDs; stripping them leaves the short ID (W...)
+_OA_PREFIXES = ("https://openalex.org/", "https://api.openalex.org/works/")
+
+def _short_id(url: str) -> str:
+    for prefix in _OA_PREFIXES:
+        if url.startswith(prefix):
+            return url[len(prefix):]
+    return url
+
 class OpenAlexClient:
     def __init__(self):
-        pass
+        # In-process tier in front of the disk cache: formatted papers by ID, results by query
+        self._papers = LRUCache(MEMORY_CACHE_SIZE)
+        self._searches = LRUCache(MEMORY_CACHE_SIZE)
 
     def invert_abstract(self, inverted_index: Dict[str, List[int]]) -> Optional[str]:
         """
@@ -34,23 +56,22 @@ class OpenAlexClient:
         if not inverted_index:
             return None
             
-        # Create a list of (position, word) tuples
-        words = []
-        for word, positions in inverted_index.items():
-            for pos in positions:
-                words.append((pos, word))
+        # Flatten to (position, word) pairs
+        flat = [(pos, word) for word, positions in inverted_index.items() for pos in positions]
+        if not flat:
+            return None
         
-        # Sort by position
-        words.sort(key=lambda x: x[0])
+        # Sort by position in NumPy; a stable sort keeps duplicate positions in input order
+        positions = np.fromiter((pos for pos, _ in flat), dtype=np.int32, count=len(flat))
+        order = np.argsort(positions, kind="stable")
         
         # Join words
-        return " ".join([w[1] for w in words])
+        return " ".join([flat[i][1] for i in order])
 
     def _format_paper(self, work: Dict[str, Any]) -> Dict[str, Any]:
         """
         Map OpenAlex Work object to our internal format.
         """
-        paper_id = work.get("id", "").replace("https://api.openalex.org/works/", "") # Clean ID? or keep URL
         # Let's keep the full ID or short ID. 
         # S2 used IDs. OpenAlex default is URL (https://openalex.org/W...) usually. 
         # The API returns id as url.
@@ -62,15 +83,11 @@ class OpenAlexClient:
         
         # Map referenced_works (list of URLs) to references list of objects
         # Our graph logic expects: references = [{"paperId": "...", ...}, ...]
-        references = []
-        for ref_url in work.get("referenced_works", []):
-            # ref_url is like "https://openalex.org/W123..." or just ID?
-            # API doc says referenced_works is list of IDs (URLs).
-            ref_id = ref_url.replace("https://openalex.org/", "").replace("https://api.openalex.org/works/", "")
-            references.append({"paperId": ref_id})
+        # API doc says referenced_works is list of IDs (URLs) like "https://openalex.org/W123..."
+        references = [{"paperId": _short_id(ref_url)} for ref_url in work.get("referenced_works") or ()]
             
         return {
-            "paperId": paper_id.replace("https://openalex.org/", "").replace("https://api.openalex.org/works/", ""),
+            "paperId": _short_id(work.get("id", "")),
             "title": work.get("title"),
             "year": work.get("publication_year"),
             "citationCount": work.get("cited_by_count"),
@@ -81,6 +98,10 @@ class OpenAlexClient:
         }
 
     def search_paper(self, query: str) -> List[Dict[str, Any]]:
+        cached = self._searches.get(query)
+        if cached is not None:
+            return cached
+        
         url = f"{OPENALEX_BASE}/works"
         params = {
             "filter": f"title.search:{query}",
@@ -90,10 +111,15 @@ class OpenAlexClient:
         data = cached_fetch(url, params)
         if not data: return []
         
-        results = data.get("results", [])
-        return [self._format_paper(w) for w in results]
+        results = [self._format_paper(w) for w in data.get("results", [])]
+        self._searches.set(query, results)
+        return results
 
     def get_paper_details(self, paper_id: str) -> Optional[Dict[str, Any]]:
+        cached = self._papers.get(paper_id)
+        if cached is not None:
+            return cached
+        
         # Handle if paper_id is not a URL
         # OpenAlex IDs are usually W123456. API accepts just the ID W...
         url = f"{OPENALEX_BASE}/works/{paper_id}"
@@ -102,34 +128,50 @@ class OpenAlexClient:
         }
         data = cached_fetch(url, params)
         if not data: return None
-        return self._format_paper(data)
+        
+        paper = self._format_paper(data)
+        self._papers.set(paper_id, paper)
+        return paper
 
     def get_papers_batch(self, paper_ids: List[str]) -> List[Dict[str, Any]]:
         if not paper_ids: return []
         
+        # Only fetch the IDs we don't already hold in memory
+        found = {pid: paper for pid in paper_ids if (paper := self._papers.get(pid)) is not None}
+        missing = [pid for pid in paper_ids if pid not in found]
+        if not missing:
+            return list(found.values())
+        
         # OpenAlex `ids` filter usually works, but `openalex_id` with full URL is safer.
         # IDs are stored as W123, convert to https://openalex.org/W123
-        full_ids = [f"https://openalex.org/{pid}" if not pid.startswith("http") else pid for pid in paper_ids]
-        
-        # Join with pipe
-        ids_str = "|".join(full_ids)
+        full_ids = [f"https://openalex.org/{pid}" if not pid.startswith("http") else pid for pid in missing]
         
         url = f"{OPENALEX_BASE}/works"
-        # Using openalex_id filter
-        params = {
-            "filter": f"openalex_id:{ids_str}",
-            "per-page": 50, # 200 is max, but safer to go lower if URL length is an issue
-            "select": "id,title,publication_year,referenced_works,cited_by_count,abstract_inverted_index"
-        }
         
-        # Note: If URL is too long, we should split into chunks.
-        # GET request limit is usually 2k-8k chars.
-        # 50 IDs * ~30 chars = 1500 chars. Safe.
+        # GET request limit is usually 2k-8k chars, so split into chunks of
+        # BATCH_CHUNK_SIZE IDs (~30 chars each) and fetch them concurrently.
+        # Each chunk is cached on its own, so repeat runs skip the network.
+        chunks = [full_ids[i:i + BATCH_CHUNK_SIZE] for i in range(0, len(full_ids), BATCH_CHUNK_SIZE)]
         
-        data = cached_fetch(url, params)
-        if not data: return []
+        def fetch_chunk(chunk_ids: List[str]) -> Optional[Dict[str, Any]]:
+            # Using openalex_id filter
+            params = {
+                "filter": f"openalex_id:{'|'.join(chunk_ids)}",
+                "per-page": 50, # 200 is max; must stay >= BATCH_CHUNK_SIZE
+                "select": "id,title,publication_year,referenced_works,cited_by_count,abstract_inverted_index"
+            }
+            return cached_fetch(url, params)
+        
+        with ThreadPoolExecutor(max_workers=min(BATCH_MAX_WORKERS, len(chunks))) as executor:
+            responses = list(executor.map(fetch_chunk, chunks))
+        
+        for data in responses:
+            if not data: continue
+            for w in data.get("results", []):
+                paper = self._format_paper(w)
+                self._papers.set(paper["paperId"], paper)
+                found[paper["paperId"]] = paper
         
-        results = data.get("results", [])
-        return [self._format_paper(w) for w in results]
+        return list(found.values())
 
 open_alex_client = OpenAlexClient()
@@ -1,13 +1,15 @@
-import requests
+import httpx
+import orjson
 import time
 from typing import Dict, Any, List, Optional
-from cache_manager import get_memory
+from cache_manager import cache_request
 
 S2_API_BASE = "https://api.semanticscholar.org/graph/v1"
 
-memory = get_memory()
+# Shared HTTP/2 client so retries and batches reuse pooled connections
+_session = httpx.Client(http2=True, timeout=15, follow_redirects=True)
 
-@memory.cache
+@cache_request
 def cached_fetch(url: str, params: Dict[str, Any] = None, headers: Dict[str, str] = None, method: str = "GET", json_body: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
     """
     Standalone cached function for HTTP requests (GET and POST).
@@ -18,9 +20,9 @@ def cached_fetch(url: str, params: Dict[str, Any] = None, headers: Dict[str, str
     for attempt in range(max_retries):
         try:
             if method.upper() == "POST":
-                response = requests.post(url, headers=headers, params=params, json=json_body)
+                response = _session.post(url, headers=headers, params=params, json=json_body)
             else:
-                response = requests.get(url, headers=headers, params=params)
+                response = _session.get(url, headers=headers, params=params)
             
             if response.status_code == 429:
                 wait_time = backoff_factor ** attempt
@@ -33,8 +35,8 @@ def cached_fetch(url: str, params: Dict[str, Any] = None, headers: Dict[str, str
                 continue
 
             response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            return orjson.loads(response.content)
+        except (httpx.HTTPError, orjson.JSONDecodeError) as e:
             print(f"Request failed: {e}")
             if attempt == max_retries - 1:
                 return None
@@ -50,10 +52,8 @@ class SemanticScholarAPI:
             self.headers["x-api-key"] = self.api_key
 
     def _make_request(self, url: str, params: Dict[str, Any] = None, method: str = "GET", json_body: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
-        # Delegate to cached function
-        # Convert dicts to tuple of items if needed for hashing? 
-        # Joblib can usually handle dicts.
-        return cached_fetch(url, params, self.headers, method, json_body)
+        # Delegate to cached function (keyed on url, params, method and body)
+        return cached_fetch(url, params, headers=self.headers, method=method, json_body=json_body)
 
     def search_paper(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
         """
@@ -93,8 +93,8 @@ class SemanticScholarAPI:
         params = {"fields": fields}
         
         # S2 batch API uses POST
-        # We need to handle caching for POST? joblib might not like POST body in *args easily if we used a wrapper.
-        # But we delegate to `_make_request`. 
+        # The JSON body is part of the cache key, so POSTs cache like GETs.
+        # We delegate to `_make_request`. 
         # `_make_request` currently does GET. We need to update it or make a new one.
         
         # Let's update `_make_request` to support 'method' and 'json_body'.
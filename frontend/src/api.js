@@ -1,5 +1,25 @@
 const API_BASE_URL = "http://localhost:8000";
 
+// Must match STREAM_ERROR_MARKER in backend/main.py
+const STREAM_ERROR_MARKER = "\n[[STREAM_ERROR]]";
+
+// Reads a streamed text response, reporting the text received so far after each chunk.
+// Throws if the backend marked the stream as failed partway through.
+const readTextStream = async (response, onChunk) => {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let text = "";
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        text += decoder.decode(value, { stream: true });
+        if (onChunk) onChunk(text.split(STREAM_ERROR_MARKER)[0]);
+    }
+    text += decoder.decode();
+    if (text.includes(STREAM_ERROR_MARKER)) throw new Error("Response stream failed");
+    return text;
+};
+
 export const api = {
     search: async (query) => {
         const response = await fetch(`${API_BASE_URL}/search?query=${encodeURIComponent(query)}`);
@@ -14,7 +34,7 @@ export const api = {
         if (!response.ok) throw new Error("Failed to build graph");
         return response.json();
     },
-    summarizeConnection: async (sourceAbstract, targetAbstract) => {
+    summarizeConnection: async (sourceAbstract, targetAbstract, onChunk) => {
         const response = await fetch(`${API_BASE_URL}/summarize_connection`, {
             method: "POST",
             headers: {
@@ -23,9 +43,9 @@ export const api = {
             body: JSON.stringify({ source_abstract: sourceAbstract, target_abstract: targetAbstract }),
         });
         if (!response.ok) throw new Error("Summarization failed");
-        return response.json();
+        return readTextStream(response, onChunk);
     },
-    explainAbstract: async (abstract) => {
+    explainAbstract: async (abstract, onChunk) => {
         const response = await fetch(`${API_BASE_URL}/explain_abstract`, {
             method: "POST",
             headers: {
@@ -34,6 +54,6 @@ export const api = {
             body: JSON.stringify({ abstract: abstract }),
         });
         if (!response.ok) throw new Error("Explanation failed");
-        return response.json();
+        return readTextStream(response, onChunk);
     }
 };
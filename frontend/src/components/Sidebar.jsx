@@ -44,11 +44,12 @@ const Sidebar = ({ selectedNode, onClose, seedNode, onBuildGraphForId }) => {
 
         setLoading(true);
         try {
-            const res = await api.summarizeConnection(seedAbstract, targetAbstract);
-            setExplanation(res.summary);
+            // Show the summary as it streams in
+            const summary = await api.summarizeConnection(seedAbstract, targetAbstract, setExplanation);
+            setExplanation(summary);
             // Cache the result
             if (selectedNode?.id) {
-                explanationCache.current[selectedNode.id] = res.summary;
+                explanationCache.current[selectedNode.id] = summary;
             }
         } catch (err) {
             setExplanation("Failed to generate explanation. Please try again.");
@@ -62,11 +63,11 @@ const Sidebar = ({ selectedNode, onClose, seedNode, onBuildGraphForId }) => {
 
         setAbstractLoading(true);
         try {
-            const res = await api.explainAbstract(targetAbstract);
-            setAbstractExplanation(res.explanation);
+            const explanation = await api.explainAbstract(targetAbstract, setAbstractExplanation);
+            setAbstractExplanation(explanation);
             // Cache the result
             if (selectedNode?.id) {
-                abstractCache.current[selectedNode.id] = res.explanation;
+                abstractCache.current[selectedNode.id] = explanation;
             }
         } catch (err) {
             setAbstractExplanation("Failed to explain abstract.");